@@ -4,10 +4,10 @@ import os
 import glob
 import pickle
 import shutil
-import zipfile
 from typing import Dict, Optional, List, Callable, Tuple, Union
 
 import numpy as np
+import dask.array as da
 import xarray as xr
 import torch
 from torch import Tensor
@@ -149,17 +149,28 @@ class ClimateDataset(torch.utils.data.Dataset):
         seq_to_seq=True,
         seq_len=12,
     ):  # -> np.ndarray():
-        array_list = []
+        lazy_list = []
         for vlist in paths:
             print("Number of files per var:", len(vlist))
             temp_data = xr.open_mfdataset(
-                vlist, concat_dim="time", combine="nested"
-            ).compute()  # .compute is not necessary but eh, doesn't hurt
-            temp_data = (
-                temp_data.to_array().to_numpy()
-            )  # Should be of shape (vars, years*ensemble_members*num_scenarios, lon, lat)
-            array_list.append(temp_data)
-        temp_data = np.concatenate(array_list, axis=0)
+                vlist, concat_dim="time", combine="nested", parallel=True
+            )  # kept lazy: only metadata is read here
+            lazy_list.append(temp_data.to_array().astype(np.float32).data)
+
+        for vlist, arr in zip(paths, lazy_list):
+            assert (
+                arr.shape[1:] == lazy_list[0].shape[1:]
+            ), f"Variable files {vlist[:1]} have shape {arr.shape[1:]}, expected {lazy_list[0].shape[1:]} (time, lon, lat) like the first variable!"
+
+        # preallocate the stacked array and let dask write every variable straight into its slice
+        temp_data = np.empty(
+            (sum(arr.shape[0] for arr in lazy_list),) + lazy_list[0].shape[1:],
+            dtype=np.float32,
+        )  # Should be of shape (vars, years*ensemble_members*num_scenarios, lon, lat)
+        start = 0
+        for arr in lazy_list:
+            da.store(arr, temp_data[start : start + arr.shape[0]])
+            start += arr.shape[0]
 
         if seq_len != SEQ_LEN:
             print(
@@ -198,7 +209,7 @@ class ClimateDataset(torch.utils.data.Dataset):
     def save_data_into_disk(
         self, data: np.ndarray, fname: str, output_save_dir: str
     ) -> str:
-        np.savez(os.path.join(output_save_dir, fname), data=data)
+        np.save(os.path.join(output_save_dir, fname), data)
         return os.path.join(output_save_dir, fname)
 
     def get_save_name_from_kwargs(self, mode: str, file: str, kwargs: Dict):
@@ -223,10 +234,7 @@ class ClimateDataset(torch.utils.data.Dataset):
                 else:
                     fname += f"{k}_{kwargs[k]}_"
 
-        if file == "statistics":
-            fname += mode + "_" + file + ".npy"
-        else:
-            fname += mode + "_" + file + ".npz"
+        fname += mode + "_" + file + ".npy"
 
         return fname
 
@@ -247,21 +255,27 @@ class ClimateDataset(torch.utils.data.Dataset):
         #     shutil.copyfile(self._out_path, h5_path_new_out)
         #     self._out_path = h5_path_new_out
 
+    def _convert_legacy_cache(self, fname, output_save_dir):
+        # caches used to be written as .npz, convert an old one once instead of rebuilding it from the NetCDF files
+        npy_path = os.path.join(output_save_dir, fname)
+        npz_path = os.path.splitext(npy_path)[0] + ".npz"
+        if os.path.isfile(npy_path) or not os.path.isfile(npz_path):
+            return
+        log.warning(
+            f"Converting legacy cache {npz_path} to {npy_path}. The .npz file is no longer used and can be deleted."
+        )
+        with np.load(npz_path) as legacy_data:
+            self.save_data_into_disk(
+                legacy_data["data"].astype(np.float32, copy=False), fname, output_save_dir
+            )
+
     def _reload_data(self, fname):
         try:
-            in_data = np.load(fname, allow_pickle=True)
-        except zipfile.BadZipFile as e:
+            # memory-mapped: only the normalized copy made from it is kept in RAM
+            return np.load(fname, mmap_mode="r")
+        except (ValueError, OSError) as e:
             log.warning(f"{fname} was not properly saved or has been corrupted.")
             raise e
-        try:
-            in_files = in_data.files
-        except AttributeError:
-            return in_data
-
-        if len(in_files) == 1:
-            return in_data[in_files[0]]
-        else:
-            return {k: in_data[k] for k in in_files}
 
     def get_years_list(self, years: str, give_list: Optional[bool] = False):
         """
@@ -301,8 +315,15 @@ class ClimateDataset(torch.utils.data.Dataset):
             data = np.moveaxis(data, -1, 0)
         else:
             data = np.moveaxis(data, 2, 0)
-        vars_mean = np.mean(data, axis=(1, 2, 3, 4))
-        vars_std = np.std(data, axis=(1, 2, 3, 4))
+        # accumulate in float64 (float32 reductions over strided axes lose precision badly),
+        # one variable at a time with float32 deviations to avoid a float64 copy of the data
+        vars_mean = np.empty(data.shape[0], dtype=np.float32)
+        vars_std = np.empty(data.shape[0], dtype=np.float32)
+        for v in range(data.shape[0]):
+            vars_mean[v] = np.mean(data[v], dtype=np.float64)
+            sq_dev = data[v] - vars_mean[v]
+            np.square(sq_dev, out=sq_dev)
+            vars_std[v] = np.sqrt(np.mean(sq_dev, dtype=np.float64))
         vars_mean = np.expand_dims(
             vars_mean, (1, 2, 3, 4)
         )  # Shape of mean & std (4, 1, 1, 1, 1)
@@ -473,12 +494,13 @@ class CMIP6Dataset(ClimateDataset):
                 if i == (num_ensembles - 1):
                     break  # if num_ensemble ==-1 we take all
 
-        # Check here if os.path.isfile($SCRATCH/data.npz) exists
+        # Check here if os.path.isfile($SCRATCH/data.npy) exists
         # if it does, use self._reload data(path)
         fname = self.get_save_name_from_kwargs(
             mode=mode, file="target", kwargs=fname_kwargs
         )
 
+        self._convert_legacy_cache(fname, output_save_dir)
         if os.path.isfile(
             os.path.join(output_save_dir, fname)
         ):  # we first need to get the name here to test that...
@@ -625,6 +647,7 @@ class Input4MipsDataset(ClimateDataset):
             mode=mode, file="input", kwargs=fname_kwargs
         )
 
+        self._convert_legacy_cache(fname, output_save_dir)
         if os.path.isfile(
             os.path.join(output_save_dir, fname)
         ):  # we first need to get the name here to test that...
@@ -4,10 +4,10 @@ import os
 import glob
 import pickle
 import shutil
-import zipfile
 from typing import Dict, Optional, List, Callable, Tuple, Union
 import copy
 import numpy as np
+import dask.array as da
 import xarray as xr
 import torch
 from torch import Tensor
@@ -83,13 +83,27 @@ class ABC_Climate_Dataset(ABC, torch.utils.data.Dataset):
                 else:
                     fname += f"{k}_{v}_"
 
-        if file == "statistics":
-            fname += f"{mode}_{file}.npy"
-        else:
-            fname += f"{mode}_{file}.npz"
+        fname += f"{mode}_{file}.npy"
 
         return fname
 
+    def _convert_legacy_cache(self, fname: str, output_save_dir: str):
+        """
+        Converts a cache written by older versions as .npz into the .npy file looked up now,
+        so it is not silently ignored and rebuilt from the NetCDF files.
+
+        Args:
+            fname (str): File name of the .npy cache.
+            output_save_dir (str): Directory of the cache files.
+        """
+        npy_path = os.path.join(output_save_dir, fname)
+        npz_path = os.path.splitext(npy_path)[0] + ".npz"
+        if os.path.isfile(npy_path) or not os.path.isfile(npz_path):
+            return
+        log.warning(f"Converting legacy cache {npz_path} to {npy_path}. The .npz file is no longer used and can be deleted.")
+        with np.load(npz_path) as legacy_data:
+            self.save_data_into_disk(legacy_data["data"].astype(np.float32, copy=False), fname, output_save_dir)
+
     def _reload_data(self, fname: str):
         """
         Reloads data from a file.
@@ -101,21 +115,12 @@ class ABC_Climate_Dataset(ABC, torch.utils.data.Dataset):
             The reloaded data.
         """
         try:
-            in_data = np.load(fname, allow_pickle=True)
-        except zipfile.BadZipFile as e:
+            # Memory-mapped: only the normalized copy made from it is kept in RAM
+            return np.load(fname, mmap_mode="r")
+        except (ValueError, OSError) as e:
             log.warning(f"{fname} was not properly saved or has been corrupted.")
             raise e
 
-        try:
-            in_files = in_data.files
-        except AttributeError:
-            return in_data
-
-        if len(in_files) == 1:
-            return in_data[in_files[0]]
-        else:
-            return {k: in_data[k] for k in in_files}
-
     def load_dataset_statistics(self, fname: str, mode: str, mips: str):
         """
         Loads dataset statistics from a file.
@@ -179,12 +184,26 @@ class ABC_Climate_Dataset(ABC, torch.utils.data.Dataset):
         Returns:
             np.ndarray: Loaded data.
         """
-        array_list = []
+        lazy_list = []
         for vlist in paths:
-            temp_data = xr.open_mfdataset(vlist, concat_dim="time", combine="nested").compute()
-            temp_data = temp_data.to_array().to_numpy()
-            array_list.append(temp_data)
-        temp_data = np.concatenate(array_list, axis=0)
+            # Kept lazy: only metadata is read here
+            temp_data = xr.open_mfdataset(vlist, concat_dim="time", combine="nested", parallel=True)
+            lazy_list.append(temp_data.to_array().astype(np.float32).data)
+
+        for vlist, arr in zip(paths, lazy_list):
+            assert arr.shape[1:] == lazy_list[0].shape[1:], (
+                f"Variable files {vlist[:1]} have shape {arr.shape[1:]}, expected {lazy_list[0].shape[1:]} "
+                "(time, lon, lat) like the first variable!"
+            )
+
+        # Preallocate the stacked array and let dask write every variable straight into its slice
+        temp_data = np.empty(
+            (sum(arr.shape[0] for arr in lazy_list),) + lazy_list[0].shape[1:], dtype=np.float32
+        )
+        start = 0
+        for arr in lazy_list:
+            da.store(arr, temp_data[start : start + arr.shape[0]])
+            start += arr.shape[0]
 
         if seq_len != SEQ_LEN:
             new_num_years = int(np.floor(temp_data.shape[1] / seq_len / len(self.scenarios)))
@@ -235,7 +254,7 @@ class ABC_Climate_Dataset(ABC, torch.utils.data.Dataset):
         Returns:
             str: Path to the saved file.
         """
-        np.savez(os.path.join(output_save_dir, fname), data=data)
+        np.save(os.path.join(output_save_dir, fname), data)
         return os.path.join(output_save_dir, fname)
 
     def copy_to_slurm(self, fname: str):
@@ -286,8 +305,15 @@ class ABC_Climate_Dataset(ABC, torch.utils.data.Dataset):
         else:
             data = np.moveaxis(data, 2, 0)
         
-        vars_mean = np.mean(data, axis=(1, 2, 3, 4))
-        vars_std = np.std(data, axis=(1, 2, 3, 4))
+        # Accumulate in float64 (float32 reductions over strided axes lose precision badly),
+        # one variable at a time with float32 deviations to avoid a float64 copy of the data
+        vars_mean = np.empty(data.shape[0], dtype=np.float32)
+        vars_std = np.empty(data.shape[0], dtype=np.float32)
+        for v in range(data.shape[0]):
+            vars_mean[v] = np.mean(data[v], dtype=np.float64)
+            sq_dev = data[v] - vars_mean[v]
+            np.square(sq_dev, out=sq_dev)
+            vars_std[v] = np.sqrt(np.mean(sq_dev, dtype=np.float64))
 
         vars_mean = np.expand_dims(vars_mean, (1, 2, 3, 4))
         vars_std = np.expand_dims(vars_std, (1, 2, 3, 4))
@@ -579,11 +605,12 @@ class CMIP6Dataset(ABC_Climate_Dataset):
             seq_len=seq_len,
         )
 
-        # Check here if os.path.isfile($SCRATCH/data.npz) exists
+        # Check here if os.path.isfile($SCRATCH/data.npy) exists
         # if it does, use self._reload data(path)
         fname = self.get_save_name_from_kwargs(
             mode=mode, file="target", kwargs=fname_kwargs
         )
+        self._convert_legacy_cache(fname, output_save_dir)
         if os.path.isfile(
             os.path.join(output_save_dir, fname)
         ):  # we first need to get the name here to test that...
@@ -736,8 +763,9 @@ class Input4MipsDataset(ABC_Climate_Dataset):
             mode=mode, file="input", kwargs=fname_kwargs
         )
 
-        # Check here if os.path.isfile($SCRATCH/data.npz) exists #TODO: check if exists on slurm
+        # Check here if os.path.isfile($SCRATCH/data.npy) exists #TODO: check if exists on slurm
         # if it does, use self._reload data(path)
+        self._convert_legacy_cache(fname, output_save_dir)
         if os.path.isfile(
             os.path.join(output_save_dir, fname)
         ):  # we first need to get the name here to test that...
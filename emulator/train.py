@@ -1,3 +1,4 @@
+import torch
 import wandb
 from hydra.utils import instantiate as hydra_instantiate
 from omegaconf import DictConfig
@@ -28,8 +29,14 @@ def run_model(config: DictConfig):
 
 
     
+    if config.get("float32_matmul_precision"):
+        torch.set_float32_matmul_precision(config.float32_matmul_precision)
+
     emulator_model, data_module = get_model_and_data(config)
     log.info(f"Got model - {config.name}")
+    if config.get("compile_model"):
+        log.info("Compiling model with torch.compile")
+        emulator_model = torch.compile(emulator_model)
     c = datetime.now()
     # Displays Time
     current_time = c.strftime('%H:%M:%S')
@@ -39,8 +46,10 @@ def run_model(config: DictConfig):
     checkpointing = True
     if config.get("pyprofile"):
         checkpointing = False
+        # memory/shape recording adds per-op overhead, so only enable it when explicitly asked for
+        profile_memory = config.get("pyprofile_memory", False)
         profiler = PyTorchProfiler(dirpath="logs/profiles",filename=f"Pyprofile-{config.name}-Basetest-{current_time}",activities=[ProfilerActivity.CPU,ProfilerActivity.CUDA],
-            profile_memory=True, record_shapes=True, on_trace_ready=tensorboard_trace_handler("logs/profiles"), schedule=schedule(wait=1, warmup=1, active=3, repeat=2))
+            profile_memory=profile_memory, record_shapes=profile_memory, on_trace_ready=tensorboard_trace_handler("logs/profiles"), schedule=schedule(wait=1, warmup=1, active=3, repeat=2))
         
     log.info(config.name)
 
@@ -68,12 +77,14 @@ def run_model(config: DictConfig):
     )
 
 
+    # codecarbon polls the hardware from a background thread, only create it if it will be used
+    emissions_tracker_enabled = emissions_tracker_enabled and not config.logger.get("name")=="none"
     emissionTracker = EmissionsTracker() if emissions_tracker_enabled else None
-    if emissionTracker and not config.logger.get("name")=="none":
+    if emissionTracker:
         emissionTracker.start()
 
     trainer.fit(model=emulator_model, datamodule=data_module)
-    if emissionTracker and not config.logger.get("name")=="none":
+    if emissionTracker:
         print(config.logger.get("wandb"))
         emissions:float = emissionTracker.stop()
         log.info(f"Total emissions: {emissions} kgCO2")
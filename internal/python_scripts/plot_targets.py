@@ -5,6 +5,8 @@ import numpy as np
 import xarray as xr
 from typing import List
 from emulator.src.utils.utils import get_years_list
+import matplotlib
+matplotlib.use('Agg') # figures are only saved to disk, never shown
 import matplotlib.pyplot as plt
 import os
 
@@ -324,7 +326,7 @@ ax.legend()
 plt.margins(x=0)
 fig.savefig(f'{plot_save_dir}/model_scenario_variance_delta_historical_{historical_data}.{format}')
 
-fig.clf()
+plt.close(fig)
 fig, ax = plt.subplots()
 
 # option b: compute min, max, mean ssp values
@@ -348,7 +350,7 @@ plt.margins(x=0)
 fig.savefig(f'{plot_save_dir}/model_scenario_variance_compute_min_max_delta_historical_{historical_data}.{format}')
 
 
-fig.clf()
+plt.close(fig)
 fig, ax = plt.subplots()
 
 # option c: compute mean + std ssp values
@@ -372,7 +374,7 @@ plt.margins(x=0)
 fig.savefig(f'{plot_save_dir}/model_scenario_variance_compute_std_delta_historical_{historical_data}.{format}')
 
 
-fig.clf()
+plt.close(fig)
 fig, ax = plt.subplots()
 
 # plot 2: lines are ssps, variance are climate models
@@ -396,7 +398,7 @@ ax.legend()
 plt.margins(x=0)
 fig.savefig(f'{plot_save_dir}/scenario_model_variance_compute_std_delta_historical_{historical_data}.{format}')
 
-fig.clf()
+plt.close(fig)
 fig, ax = plt.subplots()
 
 # option a: compute mean and std
@@ -415,4 +417,5 @@ else:
     ax.set_ylabel(var)
 ax.legend()
 plt.margins(x=0)
-fig.savefig(f'{plot_save_dir}/scenario_model_variance_compute_min_max_delta_historical_{historical_data}.{format}')
\ No newline at end of file
+fig.savefig(f'{plot_save_dir}/scenario_model_variance_compute_min_max_delta_historical_{historical_data}.{format}')
+plt.close(fig)